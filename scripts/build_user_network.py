@@ -14,18 +14,25 @@ Usage examples:
 import os
 import sys
 import logging
-from collections import defaultdict
+from collections import Counter
 from typing import Dict, Tuple
+from xml.sax.saxutils import quoteattr
 import re
 
 import argparse
-from pymongo import MongoClient
-import networkx as nx
+from pymongo import UpdateOne
+
+from db import get_client
 
 # Logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
+# Number of operations per bulk_write batch when storing edges
+BULK_WRITE_CHUNK = 1000
+
+MENTION_RE = re.compile(r"@([A-Za-z0-9_]{1,15})")
+
 
 def get_env_var(name: str) -> str:
     v = os.getenv(name)
@@ -35,68 +42,109 @@ def get_env_var(name: str) -> str:
     return v
 
 
-def load_tweets(mongo_uri: str, limit: int = 0):
-    client = MongoClient(mongo_uri)
-    db = client["demo"]
-    coll = db["tweet_collection"]
-
-    # include `text` so we can extract @mentions when `entities` is not present
-    projection = {"author_id": 1, "entities.mentions": 1, "text": 1}
-    cursor = coll.find({}, projection)
-    if limit and limit > 0:
-        cursor = cursor.limit(limit)
-    return list(cursor)
-
-
-def build_edge_counts(tweets) -> Dict[Tuple[str, str], int]:
-    edge_counts: Dict[Tuple[str, str], int] = defaultdict(int)
-    mention_re = re.compile(r"@([A-Za-z0-9_]{1,15})")
-    for t in tweets:
-        source = t.get("author_id")
-        if not source:
-            continue
-        entities = t.get("entities") or {}
-        mentions = entities.get("mentions", []) if isinstance(entities, dict) else []
-
-        seen_targets = set()
-        # Use structured mentions if available
-        for m in mentions:
-            if not isinstance(m, dict):
-                continue
-            target_id = m.get("id")
-            username = m.get("username") or m.get("screen_name")
-            if target_id:
-                target = str(target_id)
-            elif username:
-                target = "username:" + username.lower()
-            else:
-                continue
-            if target in seen_targets:
-                continue
-            edge_counts[(str(source), target)] += 1
-            seen_targets.add(target)
-
-        # Fallback: parse the tweet text for @mentions
-        text = t.get("text", "") or ""
-        for match in mention_re.findall(text):
-            target = "username:" + match.lower()
-            if target in seen_targets:
-                continue
-            edge_counts[(str(source), target)] += 1
-            seen_targets.add(target)
+def build_edge_counts(mongo_uri: str, limit: int = 0) -> Dict[Tuple[str, str], int]:
+    """Count author -> mentioned-user edges, aggregating server-side.
+
+    Tweets with structured `entities.mentions` are unwound and grouped inside
+    MongoDB so only aggregated (source, target, count) rows cross the wire;
+    tweets without them fall back to regex-parsing the text in Python.
+    """
+    client = get_client(mongo_uri)
+    coll = client["demo"]["tweet_collection"]
+
+    head = [{"$limit": limit}] if limit and limit > 0 else []
+    edge_counts: Counter = Counter()
+
+    # Structured mentions: dedupe targets within each tweet (first $group),
+    # then count edges across tweets (second $group). Prefer the mention id,
+    # falling back to a username-keyed target like the Python path did.
+    pipeline = head + [
+        {"$match": {"author_id": {"$ne": None}, "entities.mentions.0": {"$exists": True}}},
+        {"$unwind": "$entities.mentions"},
+        {"$group": {"_id": {
+            "tweet": "$_id",
+            "s": {"$toString": "$author_id"},
+            "t": {"$cond": [
+                {"$ifNull": ["$entities.mentions.id", False]},
+                {"$toString": "$entities.mentions.id"},
+                {"$concat": ["username:", {"$toLower": {"$ifNull": ["$entities.mentions.username", {"$ifNull": ["$entities.mentions.screen_name", ""]}]}}]},
+            ]},
+        }}},
+        {"$match": {"_id.t": {"$ne": "username:"}}},
+        {"$group": {"_id": {"s": "$_id.s", "t": "$_id.t"}, "c": {"$sum": 1}}},
+    ]
+    # Intern node keys: repeat lookups on skewed author distributions then
+    # short-circuit on pointer equality instead of comparing bytes.
+    for row in coll.aggregate(pipeline, allowDiskUse=True):
+        key = row["_id"]
+        edge_counts[(sys.intern(key["s"]), sys.intern(key["t"]))] += row["c"]
+
+    # Fallback: tweets without structured mentions are parsed in Python.
+    # Feeding one generator into Counter keeps the counting loop in C.
+    fallback = head + [
+        {"$match": {"author_id": {"$ne": None}, "entities.mentions.0": {"$exists": False}}},
+        {"$project": {"author_id": 1, "text": 1}},
+    ]
+    edge_counts.update(
+        (sys.intern(str(t.get("author_id"))), sys.intern("username:" + match))
+        for t in coll.aggregate(fallback, allowDiskUse=True)
+        for match in {m.lower() for m in MENTION_RE.findall(t.get("text", "") or "")}
+    )
+
+    # Structured entities can also be partial. Select — server-side — only the
+    # tweets whose text contains more @-signs than structured mentions, and
+    # add just the targets the structured data missed.
+    partial = head + [
+        {"$match": {"author_id": {"$ne": None}, "entities.mentions.0": {"$exists": True}}},
+        {"$match": {"$expr": {"$gt": [
+            {"$size": {"$regexFindAll": {"input": {"$ifNull": ["$text", ""]}, "regex": "@"}}},
+            {"$size": "$entities.mentions"},
+        ]}}},
+        {"$project": {"author_id": 1, "text": 1, "usernames": "$entities.mentions.username"}},
+    ]
+    for t in coll.aggregate(partial, allowDiskUse=True):
+        source = sys.intern(str(t.get("author_id")))
+        covered = {"username:" + u.lower() for u in (t.get("usernames") or []) if u}
+        for match in {m.lower() for m in MENTION_RE.findall(t.get("text", "") or "")}:
+            target = "username:" + match
+            if target not in covered:
+                edge_counts[(source, sys.intern(target))] += 1
 
     return edge_counts
 
 
-def build_graph(edge_counts: Dict[Tuple[str, str], int]) -> nx.DiGraph:
-    G = nx.DiGraph()
-    for (src, tgt), w in edge_counts.items():
-        G.add_edge(src, tgt, weight=w)
-    return G
+def write_gexf_stream(path: str, edge_counts: Dict[Tuple[str, str], int]) -> int:
+    """Stream a minimal GEXF file straight from the edge counts.
+
+    Emits node and edge tags directly rather than building a DiGraph and an
+    in-memory XML tree, so memory stays bounded by the node-id set.
+    Returns the number of nodes written.
+    """
+    nodes = set()
+    for src, tgt in edge_counts:
+        nodes.add(src)
+        nodes.add(tgt)
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<gexf xmlns="http://www.gexf.net/1.2draft" version="1.2">\n')
+        f.write('  <graph defaultedgetype="directed">\n')
+        f.write("    <nodes>\n")
+        for n in nodes:
+            f.write(f"      <node id={quoteattr(n)} label={quoteattr(n)} />\n")
+        f.write("    </nodes>\n")
+        f.write("    <edges>\n")
+        for i, ((src, tgt), w) in enumerate(edge_counts.items()):
+            f.write(f'      <edge id="{i}" source={quoteattr(src)} target={quoteattr(tgt)} weight="{w}" />\n')
+        f.write("    </edges>\n")
+        f.write("  </graph>\n")
+        f.write("</gexf>\n")
+
+    return len(nodes)
 
 
 def store_network(mongo_uri: str, edge_counts: Dict[Tuple[str, str], int], clear_existing: bool = False):
-    client = MongoClient(mongo_uri)
+    client = get_client(mongo_uri)
     db = client["demo"]
     coll = db["user_network"]
 
@@ -104,10 +152,15 @@ def store_network(mongo_uri: str, edge_counts: Dict[Tuple[str, str], int], clear
         logger.info("Clearing existing 'user_network' collection")
         coll.delete_many({})
 
-    # Upsert each edge document with a composite _id to avoid duplicates
-    for (src, tgt), w in edge_counts.items():
-        _id = f"{src}__{tgt}"
-        coll.update_one({"_id": _id}, {"$set": {"source": src, "target": tgt, "count": w}}, upsert=True)
+    # Upsert each edge document with a composite _id to avoid duplicates.
+    # Batch the upserts into unordered bulk_write calls so the server can
+    # process them in parallel instead of paying one round-trip per edge.
+    ops = [
+        UpdateOne({"_id": f"{src}__{tgt}"}, {"$set": {"source": src, "target": tgt, "count": w}}, upsert=True)
+        for (src, tgt), w in edge_counts.items()
+    ]
+    for i in range(0, len(ops), BULK_WRITE_CHUNK):
+        coll.bulk_write(ops[i:i + BULK_WRITE_CHUNK], ordered=False, bypass_document_validation=True)
     logger.info("Stored %d edges to demo.user_network", len(edge_counts))
 
 
@@ -122,10 +175,7 @@ def main():
     args = parser.parse_args()
 
     mongo_uri = get_env_var("MONGODB_CONNECT")
-    tweets = load_tweets(mongo_uri, limit=args.limit)
-    logger.info("Loaded %d tweets", len(tweets))
-
-    edge_counts = build_edge_counts(tweets)
+    edge_counts = build_edge_counts(mongo_uri, limit=args.limit)
     logger.info("Found %d edges (unique source->target pairs)", len(edge_counts))
 
     if args.dry_run:
@@ -136,13 +186,10 @@ def main():
             logger.info("%s -> %s : %d", src, tgt, w)
         return
 
-    G = build_graph(edge_counts)
-    logger.info("Graph has %d nodes and %d edges", G.number_of_nodes(), G.number_of_edges())
-
     if args.out:
         try:
-            nx.write_gexf(G, args.out)
-            logger.info("Wrote graph to %s", args.out)
+            n_nodes = write_gexf_stream(args.out, edge_counts)
+            logger.info("Wrote graph with %d nodes and %d edges to %s", n_nodes, len(edge_counts), args.out)
         except Exception as e:
             logger.exception("Failed to write graph file: %s", e)
 
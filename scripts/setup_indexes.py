@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""One-time index setup for demo.tweet_collection.
+
+Creates the indexes the analysis scripts rely on so their aggregations and
+filtered finds hit an index scan instead of sweeping the whole collection:
+- author_id (edge building groups by author)
+- lang (language distribution)
+- entities.mentions.username (multikey; mention unwind/group)
+
+Environment variables:
+- MONGODB_CONNECT: MongoDB connection string
+
+Usage: python scripts/setup_indexes.py
+"""
+
+import os
+import sys
+import logging
+
+from db import get_client
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger(__name__)
+
+INDEXES = [
+    [("author_id", 1)],
+    [("lang", 1)],
+    [("entities.mentions.username", 1)],
+]
+
+
+def get_env_var(name: str) -> str:
+    v = os.getenv(name)
+    if not v:
+        logger.error("Missing required environment variable: %s", name)
+        sys.exit(1)
+    return v
+
+
+def main():
+    mongo_uri = get_env_var("MONGODB_CONNECT")
+    coll = get_client(mongo_uri)["demo"]["tweet_collection"]
+    for keys in INDEXES:
+        name = coll.create_index(keys)
+        logger.info("Ensured index %s", name)
+    logger.info("Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,23 +17,31 @@ Usage:
 - python scripts/summarize_tweets.py --limit 100 --out artifacts/tweet_summary.txt --top 5
 """
 
+import functools
+import heapq
+import operator
 import os
 import re
 import sys
 import logging
 from collections import Counter
 from datetime import datetime
+from multiprocessing import Pool
 from typing import List
 
 import argparse
 import nltk
-from pymongo import MongoClient
+from db import get_client
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
 HASHTAG_RE = re.compile(r"#([A-Za-z0-9_]+)")
 MENTION_RE = re.compile(r"@([A-Za-z0-9_]{1,15})")
+TOKEN_RE = re.compile(r"[a-z]+")
+
+# Tweets handed to each worker process at a time
+CHUNK_SIZE = 500
 
 
 def get_env_var(name: str) -> str:
@@ -45,6 +53,10 @@ def get_env_var(name: str) -> str:
 
 
 def ensure_nltk():
+    # NLTK_READY (set e.g. by the image build) asserts the corpora are baked
+    # in, so skip the nltk_data path walk entirely
+    if os.getenv("NLTK_READY"):
+        return
     try:
         nltk.data.find("tokenizers/punkt")
     except Exception:
@@ -57,97 +69,161 @@ def ensure_nltk():
         nltk.download("stopwords")
 
 
-def summarize_tweets(mongo_uri: str, limit: int = 0, top: int = 5, out_path: str = "artifacts/tweet_summary.txt") -> str:
-    client = MongoClient(mongo_uri)
-    db = client["demo"]
-    coll = db["tweet_collection"]
+@functools.lru_cache(maxsize=1)
+def get_stopwords() -> frozenset:
+    """Memoized English stopword set; loading it reads the corpus from disk."""
+    ensure_nltk()
+    return frozenset(nltk.corpus.stopwords.words("english"))
 
-    projection = {"text": 1, "created_at": 1, "lang": 1, "public_metrics": 1, "entities": 1, "author_id": 1}
-    cursor = coll.find({}, projection)
-    if limit and limit > 0:
-        cursor = cursor.limit(limit)
-    tweets = list(cursor)
 
-    if not tweets:
-        logger.info("No tweets found in demo.tweet_collection")
-        return ""
+def _parse_iso(s: str):
+    try:
+        return datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except Exception:
+        return None
 
-    ensure_nltk()
-    stopwords = set(nltk.corpus.stopwords.words("english"))
 
-    total = len(tweets)
+def _chunked(cursor, size):
+    chunk = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _summarize_chunk(args):
+    """Fold one chunk of tweet docs into partial counters (runs in a worker)."""
+    docs, top = args
+    stopwords = get_stopwords()
+    total = 0
     dates = []
     hashtags = Counter()
     mentions = Counter()
     words = Counter()
-    langs = Counter()
     rep_candidates = []
 
-    for t in tweets:
+    for t in docs:
+        total += 1
         text = (t.get("text") or "")
-        # created_at may be a string or missing
+        # created_at is ISO-8601 (e.g. 2024-01-31T12:00:00.000Z), which orders
+        # lexicographically — so min/max can compare raw strings and the
+        # expensive parse happens only twice, at the very end
         created = t.get("created_at")
-        if created:
-            try:
-                # try ISO format
-                dt = datetime.fromisoformat(created.replace("Z", "+00:00"))
-                dates.append(dt)
-            except Exception:
-                pass
-
-        # structured entities if present
-        ent = t.get("entities") or {}
-        ents_mentions = []
-        try:
-            for m in ent.get("mentions", []) or []:
-                uname = m.get("username") or m.get("screen_name")
-                if uname:
-                    mentions[uname.lower()] += 1
-                    ents_mentions.append(uname.lower())
-        except Exception:
-            pass
-
-        # regex fallback for mentions
-        for m in MENTION_RE.findall(text):
-            mentions[m.lower()] += 1
+        if isinstance(created, str) and len(created) >= 10 and created[:4].isdigit():
+            dates.append(created)
+
+        text_lc = text.lower()
+
+        # regex fallback for mentions; Counter.update runs the increments in C
+        # and sys.intern lets repeat keys compare by pointer identity
+        mentions.update(sys.intern(m.group(1)) for m in MENTION_RE.finditer(text_lc))
 
         # hashtags
-        for h in HASHTAG_RE.findall(text):
-            hashtags[h.lower()] += 1
+        hashtags.update(sys.intern(m.group(1)) for m in HASHTAG_RE.finditer(text_lc))
 
         # words — use a simple regex tokenizer (avoids NLTK punkt/punkt_tab issues)
-        tokens = re.findall(r"\b[a-zA-Z]+\b", text.lower())
-        for tok in tokens:
-            if tok in stopwords:
-                continue
-            words[tok] += 1
-
-        # language
-        if t.get("lang"):
-            langs[t.get("lang")] += 1
-
-        # engagement score from public_metrics if present
-        pm = t.get("public_metrics") or {}
-        engagement = 0
-        try:
-            engagement = int(pm.get("retweet_count", 0)) + int(pm.get("reply_count", 0)) + int(pm.get("like_count", 0)) + int(pm.get("quote_count", 0))
-        except Exception:
-            engagement = 0
-
-        rep_candidates.append((engagement, len(text), t))
+        words.update(sys.intern(m.group()) for m in TOKEN_RE.finditer(text_lc) if m.group() not in stopwords)
+
+        # engagement sum is computed server-side by the $project
+        engagement = t.get("engagement") or 0
+
+        # keep only a small tuple per tweet, not the full doc
+        tid = str(t.get("_id") or t.get("id") or "")
+        clean = text.replace("\n", " ")
+        excerpt = clean if len(clean) <= 240 else clean[:237] + "..."
+        rep_candidates.append((engagement, len(text), tid, excerpt, t.get("author_id") or ""))
+
+    span = (min(dates), max(dates)) if dates else None
+    return total, span, hashtags, mentions, words, heapq.nlargest(top, rep_candidates)
+
+
+def summarize_tweets(mongo_uri: str, limit: int = 0, top: int = 5, out_path: str = "artifacts/tweet_summary.txt") -> str:
+    client = get_client(mongo_uri, read_secondary=True)
+    db = client["demo"]
+    coll = db["tweet_collection"]
+
+    head = [{"$limit": limit}] if limit and limit > 0 else []
+
+    # Server-side tallies: language distribution and structured mentions are
+    # grouped inside MongoDB so only aggregated rows come back.
+    langs = Counter()
+    for row in coll.aggregate(head + [{"$group": {"_id": "$lang", "n": {"$sum": 1}}}]):
+        if row["_id"]:
+            langs[row["_id"]] += row["n"]
+
+    mentions = Counter()
+    mention_pipeline = head + [
+        {"$unwind": "$entities.mentions"},
+        {"$group": {
+            "_id": {"$toLower": {"$ifNull": ["$entities.mentions.username", {"$ifNull": ["$entities.mentions.screen_name", ""]}]}},
+            "n": {"$sum": 1},
+        }},
+    ]
+    for row in coll.aggregate(mention_pipeline, allowDiskUse=True):
+        if row["_id"]:
+            mentions[row["_id"]] += row["n"]
+
+    # Everything that needs the raw text (hashtags, words, regex mentions,
+    # representative tweets) still streams the documents. A $project computes
+    # the engagement sum server-side so a single scalar ships instead of the
+    # whole public_metrics subdocument.
+    def metric(field: str):
+        return {"$convert": {"input": f"$public_metrics.{field}", "to": "long", "onError": 0, "onNull": 0}}
+
+    stream_pipeline = head + [{"$project": {
+        "text": 1,
+        "created_at": 1,
+        "author_id": 1,
+        "engagement": {"$add": [metric("retweet_count"), metric("reply_count"), metric("like_count"), metric("quote_count")]},
+    }}]
+    cursor = coll.aggregate(stream_pipeline, allowDiskUse=True, batchSize=1000)
+
+    # Warm the corpus in the parent so a cold download happens exactly once
+    # and forked workers inherit the cached set.
+    get_stopwords()
+
+    # Fan chunks of the cursor out to worker processes; each returns partial
+    # counters that merge in C via Counter.update. Peak memory stays at
+    # workers x CHUNK_SIZE docs.
+    total = 0
+    dates = []
+    hashtags = Counter()
+    words = Counter()
+    rep_candidates = []
+
+    with Pool(os.cpu_count()) as pool:
+        chunk_args = ((chunk, top) for chunk in _chunked(cursor, CHUNK_SIZE))
+        for n, span, h, m, w, rep in pool.imap_unordered(_summarize_chunk, chunk_args):
+            total += n
+            if span:
+                dates.extend(span)
+            hashtags.update(h)
+            mentions.update(m)
+            words.update(w)
+            rep_candidates = heapq.nlargest(top, rep_candidates + rep)
+
+    if not total:
+        logger.info("No tweets found in demo.tweet_collection")
+        return ""
 
     # choose representative tweets: top by engagement, then length
-    rep_sorted = sorted(rep_candidates, key=lambda x: (-x[0], -x[1]))[:top]
+    rep_sorted = rep_candidates
 
     # prepare summary text
     lines: List[str] = []
     lines.append(f"Tweet summary for {total} tweets")
     if dates:
-        lines.append(f"Time span: {min(dates).isoformat()} to {max(dates).isoformat()}")
+        start, end = _parse_iso(min(dates)), _parse_iso(max(dates))
+        if start and end:
+            lines.append(f"Time span: {start.isoformat()} to {end.isoformat()}")
     lines.append("")
 
     def top_list(counter: Counter, n=10):
-        return counter.most_common(n)
+        # O(V log K) heap selection; never sorts the full vocabulary
+        return heapq.nlargest(n, counter.items(), key=operator.itemgetter(1))
 
     lines.append("Top hashtags:")
     for k, v in top_list(hashtags, 20):
@@ -178,13 +254,8 @@ def summarize_tweets(mongo_uri: str, limit: int = 0, top: int = 5, out_path: str
     lines.append("")
 
     lines.append("Representative tweets:")
-    for eng, length, t in rep_sorted:
-        tid = str(t.get("_id") or t.get("id") or "")
-        auth = t.get("author_id") or ""
-        text = (t.get("text") or "").replace("\n", " ")
+    for eng, length, tid, excerpt, auth in rep_sorted:
         lines.append(f"- id={tid} author={auth} engagement={eng} len={length}")
-        # include short excerpt
-        excerpt = text if len(text) <= 240 else text[:237] + "..."
         lines.append(f"  {excerpt}")
         lines.append("")
 
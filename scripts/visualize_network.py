@@ -11,19 +11,73 @@ Usage:
 - python scripts/visualize_network.py --out user_network.png --top 100 (will build GEXF from DB if missing)
 """
 
+import hashlib
+import json
 import os
+import re
 import sys
 import logging
+from collections import defaultdict
 from typing import Optional
 
 import argparse
 import networkx as nx
+import numpy as np
+import matplotlib
+
+# Headless Agg backend: no GUI toolkit init, works on display-less machines
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-from pymongo import MongoClient
+from matplotlib.collections import LineCollection
+from db import get_client
+
+# Optional C-backed graph library; degree ranking and layout are 10-100x
+# faster than networkx when it is installed.
+try:
+    import igraph as ig
+except ImportError:
+    ig = None
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
+MENTION_RE = re.compile(r"@([A-Za-z0-9_]{1,15})")
+
+# Layouts are deterministic per graph, so cache them keyed by a graph digest
+# and re-renders skip the force-directed computation entirely.
+LAYOUT_CACHE_DIR = ".layout_cache"
+
+
+def _graph_digest(backend: str, names, src_idx, tgt_idx, weights, top_n: int) -> str:
+    # The backend is part of the key: igraph caches a coord list while the
+    # networkx fallback caches a name-keyed dict, and the two must not collide.
+    h = hashlib.sha1()
+    h.update(backend.encode())
+    h.update("\x00".join(names).encode())
+    h.update(src_idx.tobytes())
+    h.update(tgt_idx.tobytes())
+    h.update(weights.tobytes())
+    h.update(str(top_n).encode())
+    return h.hexdigest()
+
+
+def _load_cached_layout(digest: str):
+    path = os.path.join(LAYOUT_CACHE_DIR, digest + ".json")
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            logger.warning("Ignoring unreadable layout cache %s", path)
+    return None
+
+
+def _save_cached_layout(digest: str, layout):
+    os.makedirs(LAYOUT_CACHE_DIR, exist_ok=True)
+    path = os.path.join(LAYOUT_CACHE_DIR, digest + ".json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(layout, f)
+
 
 def load_graph_from_gexf(path: str) -> nx.DiGraph:
     logger.info("Loading graph from %s", path)
@@ -31,11 +85,11 @@ def load_graph_from_gexf(path: str) -> nx.DiGraph:
 
 
 def build_graph_from_db(mongo_uri: str) -> nx.DiGraph:
-    client = MongoClient(mongo_uri)
+    client = get_client(mongo_uri, read_secondary=True)
     db = client["demo"]
     coll = db["user_network"]
     G = nx.DiGraph()
-    for doc in coll.find():
+    for doc in coll.find({}, {"source": 1, "target": 1, "count": 1}, batch_size=1000):
         src = str(doc.get("source"))
         tgt = str(doc.get("target"))
         w = int(doc.get("count", 1))
@@ -44,15 +98,94 @@ def build_graph_from_db(mongo_uri: str) -> nx.DiGraph:
     return G
 
 
+def _edge_arrays(G: nx.DiGraph):
+    """Flatten the graph into SoA arrays: node names plus (src, tgt, weight).
+
+    Dense int indices let degree and top-N ranking run as NumPy array ops
+    instead of Python dict traversals.
+    """
+    names = list(G.nodes())
+    index = {n: i for i, n in enumerate(names)}
+    edge_list = G.edges(data="weight", default=1)
+    src_idx = np.array([index[u] for u, _, _ in edge_list], dtype=np.int32)
+    tgt_idx = np.array([index[v] for _, v, _ in edge_list], dtype=np.int32)
+    weights = np.array([w for _, _, w in edge_list], dtype=np.float32)
+    return names, src_idx, tgt_idx, weights
+
+
+def _weighted_degree_top(names, src_idx, tgt_idx, weights, top_n: int):
+    """Weighted degrees via bincount and the top-N indices, highest first."""
+    n = len(names)
+    deg = np.bincount(src_idx, weights=weights, minlength=n) + np.bincount(tgt_idx, weights=weights, minlength=n)
+    k = min(top_n, n)
+    top = np.argpartition(deg, -k)[-k:]
+    top = top[np.argsort(deg[top])[::-1]]
+    return deg, top
+
+
+def _make_plot_igraph(G: nx.DiGraph, out_path: str, top_n: int):
+    """Rank, lay out, and draw the graph via igraph's C implementations."""
+    names, src_idx, tgt_idx, weights = _edge_arrays(G)
+
+    g = ig.Graph(n=len(names), edges=list(zip(src_idx.tolist(), tgt_idx.tolist())), directed=True)
+    g.es["weight"] = weights.tolist()
+
+    strength, order = _weighted_degree_top(names, src_idx, tgt_idx, weights, top_n)
+    order = order.tolist()
+    top_set = set(order)
+
+    # Include neighbors to give context
+    neighbors = set()
+    for v in order:
+        neighbors.update(g.neighbors(v, mode="all"))
+    sub_ids = sorted(top_set | neighbors)
+    h = g.induced_subgraph(sub_ids)
+
+    digest = _graph_digest("ig", names, src_idx, tgt_idx, weights, top_n)
+    coords = _load_cached_layout(digest)
+    if not isinstance(coords, list):
+        coords = None
+    if coords is None:
+        coords = h.layout_fruchterman_reingold(weights="weight", niter=200).coords
+        _save_cached_layout(digest, coords)
+
+    max_strength = strength[order[0]] or 1
+    sizes = [max(50, int(500 * (strength[orig] / max_strength))) for orig in sub_ids]
+
+    fig, ax = plt.subplots(figsize=(12, 9))
+    segments = [(coords[e.source], coords[e.target]) for e in h.es]
+    ax.add_collection(LineCollection(segments, colors="#333333", alpha=0.6, linewidths=0.5))
+    ax.scatter([c[0] for c in coords], [c[1] for c in coords], s=sizes, c="#1f78b4", alpha=0.9, zorder=2)
+
+    # Label only top nodes for readability
+    for i, orig in enumerate(sub_ids):
+        if orig in top_set:
+            ax.text(coords[i][0], coords[i][1], names[orig], fontsize=8, ha="center", va="center", zorder=3)
+
+    ax.autoscale()
+    ax.set_axis_off()
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=200)
+    plt.close(fig)
+    logger.info("Saved visualization to %s", out_path)
+
+
 def make_plot(G: nx.DiGraph, out_path: str, top_n: int = 100):
     if G.number_of_nodes() == 0:
         logger.error("Graph is empty; nothing to plot")
         return
 
-    # Use weighted degree to rank nodes
-    deg = dict(G.degree(weight="weight"))
-    top_nodes = sorted(deg.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
-    nodes_set = set(n for n, _ in top_nodes)
+    if ig is not None:
+        _make_plot_igraph(G, out_path, top_n)
+        return
+
+    # Pure-networkx fallback when igraph is not installed.
+    # Weighted degree and top-N still run as NumPy array ops.
+    names, src_idx, tgt_idx, weights = _edge_arrays(G)
+    deg_arr, order = _weighted_degree_top(names, src_idx, tgt_idx, weights, top_n)
+    deg = {names[i]: deg_arr[i] for i in range(len(names))}
+    top_names = [names[i] for i in order.tolist()]
+    nodes_set = set(top_names)
     # Include neighbors to give context
     neighbors = set()
     for n in list(nodes_set):
@@ -61,18 +194,25 @@ def make_plot(G: nx.DiGraph, out_path: str, top_n: int = 100):
     sub_nodes = list(nodes_set | neighbors)
     H = G.subgraph(sub_nodes).copy()
 
-    # Layout
-    pos = nx.spring_layout(H, k=0.7, seed=42)
+    # Layout (cached on disk; spring_layout is the slow step on re-renders)
+    digest = _graph_digest("nx", names, src_idx, tgt_idx, weights, top_n)
+    cached = _load_cached_layout(digest)
+    if isinstance(cached, dict) and all(n in cached for n in H.nodes()):
+        pos = {n: cached[n] for n in H.nodes()}
+    else:
+        pos = nx.spring_layout(H, k=0.7, seed=42)
+        _save_cached_layout(digest, {n: [float(x), float(y)] for n, (x, y) in pos.items()})
 
     # Node sizes by degree
-    sizes = [max(50, int(500 * (deg.get(n, 0) / (deg[top_nodes[0][0]] or 1)))) for n in H.nodes()]
+    max_deg = deg[top_names[0]] or 1
+    sizes = [max(50, int(500 * (deg.get(n, 0) / max_deg))) for n in H.nodes()]
 
     plt.figure(figsize=(12, 9))
     nx.draw_networkx_nodes(H, pos, node_size=sizes, node_color="#1f78b4", alpha=0.9)
     nx.draw_networkx_edges(H, pos, arrowstyle="->", arrowsize=8, edge_color="#333333", alpha=0.6)
 
     # Label only top nodes for readability
-    labels = {n: n for n, _ in top_nodes if n in H}
+    labels = {n: n for n in top_names if n in H}
     nx.draw_networkx_labels(H, pos, labels=labels, font_size=8)
 
     plt.axis("off")
@@ -110,21 +250,18 @@ def main():
         if G.number_of_nodes() == 0:
             logger.info("demo.user_network empty; attempting to build from tweet_collection")
             # Reuse the logic from the other script here by reading tweet_collection and creating edges
-            coll = MongoClient(mongo_uri)["demo"]["tweet_collection"]
+            coll = get_client(mongo_uri, read_secondary=True)["demo"]["tweet_collection"]
             projection = {"author_id": 1, "text": 1}
-            tweets = list(coll.find({}, projection))
+            tweets = coll.find({}, projection, batch_size=1000)
             # Create temporary graph
-            from collections import defaultdict
-            import re
             edge_counts = defaultdict(int)
-            mention_re = re.compile(r"@([A-Za-z0-9_]{1,15})")
             for t in tweets:
                 src = t.get("author_id")
                 if not src:
                     continue
                 text = t.get("text", "") or ""
                 seen = set()
-                for m in mention_re.findall(text):
+                for m in MENTION_RE.findall(text):
                     tgt = "username:" + m.lower()
                     if tgt in seen:
                         continue